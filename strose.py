@@ -1,7 +1,258 @@
+from collections import deque, namedtuple
+from functools import lru_cache
+
 import numpy as np
 import simpy
+from scipy.special import ndtr, ndtri
+
+# phases journaled for every CareActivity, as '<label>:<phase>'
+EVENT_PHASES = ('queue', 'start', 'end')
+
+
+# default random number source for g_rand and friends, created once at import
+_rng = np.random.default_rng()
+
+# bounds on how many samples are pre-drawn per parameter set at a time
+_GRAND_MIN_BATCH_SIZE = 16
+_GRAND_BATCH_SIZE = 4096
+
+# how many distinct parameter sets the module-level caches will hold; past
+# that, new parameter sets are computed or drawn on the spot and not kept,
+# so callers whose parameters vary per call don't grow them without bound
+_GRAND_CACHE_MAX_KEYS = 256
+_TRUNC_CDF_CACHE_MAX_KEYS = 1024
+
+# standard normal CDF values at the truncation points, keyed the same way
+_TRUNC_CDF_CACHE = {}
+
+
+def _trunc_cdf_bounds(mu, sigma, lo, hi):
+    """Internal helper returning (Fa, Fb, sign) for the standardized
+    truncation interval [alpha, beta]. Fa and Fb are the standard normal CDF
+    at either end; an infinite bound maps straight to 0 or 1 without calling
+    ndtr.
+    
+    When the whole interval sits above the mean, Phi(alpha) and Phi(beta)
+    both crowd up against 1 and the difference between them loses precision
+    (or vanishes entirely past ~8 sigma). In that case the interval is
+    mirrored to [-beta, -alpha], where the CDF values are small and exact,
+    and sign is -1 so the draws can be flipped back.
+    """
+    key = (mu, sigma, lo, hi)
+    bounds = _TRUNC_CDF_CACHE.get(key)
+    if bounds is None:
+        alpha = (lo - mu) / sigma
+        beta = (hi - mu) / sigma
+        sign = 1.0
+        if alpha > 0:
+            alpha, beta, sign = -beta, -alpha, -1.0
+        
+        Fa = 0.0 if alpha == -np.inf else ndtr(alpha)
+        Fb = 1.0 if beta == np.inf else ndtr(beta)
+        bounds = (Fa, Fb, sign)
+        if len(_TRUNC_CDF_CACHE) < _TRUNC_CDF_CACHE_MAX_KEYS:
+            _TRUNC_CDF_CACHE[key] = bounds
+    
+    return bounds
+
+
+def _near_bound(lo, hi, sign):
+    """Internal helper returning whichever of lo and hi is closest to the
+    mean, for an interval already mirrored (or not) by _trunc_cdf_bounds.
+    """
+    return lo if sign < 0 else hi
+
+
+def _trunc_batch(mu, sigma, lo, hi, n, rng=_rng):
+    """Internal helper to draw n samples from a gaussian truncated to
+    [lo, hi] by inverting the CDF on a batch of uniforms:
+    
+        Phi^-1(Phi(alpha) + U * (Phi(beta) - Phi(alpha))) * sigma + mu
+    
+    rng may be a numpy Generator, or anything else with the same random()
+    and normal() methods, such as the legacy np.random module.
+    """
+    Fa, Fb, sign = _trunc_cdf_bounds(mu, sigma, lo, hi)
+    U = rng.random(n)
+    z = ndtri(Fa + U * (Fb - Fa))
+    out = (sign * z) * sigma + mu
+    
+    # from ~38 sigma out even the mirrored CDF underflows and ndtri gives
+    # +/-inf; the draws there all crowd against the bound nearest mu anyway
+    out[~np.isfinite(out)] = _near_bound(lo, hi, sign)
+    
+    # guard against the last ulp of rounding landing just outside the bounds
+    np.clip(out, lo, hi, out=out)
+    
+    return out
+
+
+def _grand_batch(mu, sigma, lo, hi, output_integers, n, rng=_rng):
+    """Internal helper to draw n samples for g_rand / g_rand_batch in one
+    vectorized call, rather than one scalar NumPy call per sample. Bounds
+    must already be resolved to numbers, with -inf/inf for none.
+    """
+    if sigma == 0 or lo > hi:
+        # no spread to sample from (or nowhere to put it), just mu clamped
+        # into the bounds; if they cross, the minimum wins
+        batch = np.full(n, max(lo, min(mu, hi)), dtype=float)
+    elif lo == -np.inf and hi == np.inf:
+        batch = rng.normal(mu, sigma, size=n)
+    else:
+        batch = _trunc_batch(mu, sigma, lo, hi, n, rng)
+    
+    if output_integers:
+        batch = batch.astype(np.int64)
+    
+    return batch
+
+
+def _grand_one(mu, sigma, lo, hi, output_integers, rng=_rng):
+    """Internal helper to draw a single sample with scalar math, for when a
+    batch would be wasted: a caller-supplied rng, or a parameter set that
+    isn't going to be cached.
+    """
+    if sigma == 0 or lo > hi:
+        # see _grand_batch
+        sample = max(lo, min(mu, hi))
+    elif lo == -np.inf and hi == np.inf:
+        sample = rng.normal(mu, sigma)
+    else:
+        Fa, Fb, sign = _trunc_cdf_bounds(mu, sigma, lo, hi)
+        sample = (sign * ndtri(Fa + rng.random() * (Fb - Fa))) * sigma + mu
+        if not np.isfinite(sample):
+            # see _trunc_batch
+            sample = _near_bound(lo, hi, sign)
+        sample = max(lo, min(sample, hi))
+    
+    if output_integers:
+        return int(sample)
+    
+    return float(sample)
+
+
+class _SampleCache(dict):
+    """Internal store of pre-drawn g_rand samples, as a deque per _TimeBounds
+    key, along with the random number source they are drawn from.
+    
+    Batches start small and double on each refill, up to _GRAND_BATCH_SIZE,
+    so a cache that is only ever asked for a handful of samples (say, one
+    SimulatedUnit's worth) doesn't pay for drawing thousands.
+    
+    max_keys: optional cap on how many parameter sets get batches of their
+        own; once it is reached, samples for any other parameter set are
+        drawn one at a time and nothing more is stored.
+    """
+    def __init__(self, rng, max_keys=None):
+        self.rng = rng
+        self.max_keys = max_keys
+        self._batch_sizes = {}
+    
+    def refill(self, bounds):
+        """Draw a fresh batch for bounds and return its first sample"""
+        if self.max_keys is not None and len(self) >= self.max_keys and bounds not in self:
+            return _grand_one(*bounds, self.rng)
+        
+        n = min(_GRAND_BATCH_SIZE, 2 * self._batch_sizes.get(bounds, _GRAND_MIN_BATCH_SIZE // 2))
+        self._batch_sizes[bounds] = n
+        samples = self[bounds] = deque(_grand_batch(*bounds, n, self.rng).tolist())
+        return samples.popleft()
+
+
+# module-level samples for g_rand and friends
+_GRAND_CACHE = _SampleCache(_rng, max_keys=_GRAND_CACHE_MAX_KEYS)
+
+
+@lru_cache(maxsize=256)
+def _parse_sbound(bound):
+    """Internal helper to parse a bound like '3s' into its number of standard
+    deviations. Returns None for anything that is not an 's'-string.
+    """
+    if isinstance(bound, str) and 's' in bound:
+        return float(bound.replace('s', ''))
+    
+    return None
+
+
+# fully resolved g_rand parameters; also used directly as the _GRAND_CACHE key
+_TimeBounds = namedtuple('_TimeBounds', ['mu', 'sigma', 'lo', 'hi', 'as_int'])
+
+
+def _sample_trunc(bounds, cache=_GRAND_CACHE):
+    """Internal sampling kernel behind g_rand and SimulatedUnit. Takes an
+    already-resolved _TimeBounds, which doubles as the cache key, so the
+    per-call cost is one dict lookup and one popleft; NumPy is only touched
+    when a batch runs dry.
+    """
+    try:
+        return cache[bounds].popleft()
+    except (KeyError, IndexError):
+        return cache.refill(bounds)
+
+
+def _sample_with(bounds, rng=None):
+    """Internal helper for the public g_rand functions: samples come from the
+    module-level cache, or are drawn one at a time from rng when one is
+    given, since a caller-supplied rng has no cache of its own to keep.
+    """
+    if rng is None:
+        return _sample_trunc(bounds)
+    
+    return _grand_one(*bounds, rng)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_bounds(mu, sigma=0, minimum=None, maximum=None, output_integers=True):
+    """Internal helper to turn g_rand-style arguments into a _TimeBounds,
+    expanding any 's'-string bounds into plain numbers and missing bounds
+    into -inf/inf. Raises ValueError for a negative sigma. Cached, so each
+    distinct parameter set is only resolved once.
+    """
+    if sigma < 0:
+        raise ValueError("sigma ({}) must not be negative".format(sigma))
+    
+    sigmas_max = _parse_sbound(maximum)
+    if sigmas_max is not None:
+        maximum = mu + (sigma * sigmas_max)
+    
+    sigmas_min = _parse_sbound(minimum)
+    if sigmas_min is not None:
+        minimum = mu - (sigma * sigmas_min)
+    
+    if minimum is None:
+        minimum = -np.inf
+    if maximum is None:
+        maximum = np.inf
+    
+    return _TimeBounds(mu, sigma, minimum, maximum, output_integers)
+
+
+def _resolve_params(time_requirements):
+    """Internal helper to turn a g_rand-style time_requirements dict into
+    a _TimeBounds (see _resolve_bounds)
+    """
+    return _resolve_bounds(**time_requirements)
+
 
-def g_rand(mu, sigma=0, minimum=None, maximum=None, output_integers=True):
+def g_rand_resolved(mu, sigma=0, lo=None, hi=None, as_int=True, rng=None):
+    """Same as g_rand, but for bounds that have already been resolved to
+    numbers (or None), so no string handling happens per call.
+    
+    mu: required, number for center of distribution
+    sigma: optional, standard deviation for distribution
+    lo: optional, numeric lower bound or None
+    hi: optional, numeric upper bound or None
+    as_int: optional, whether to truncate samples to integers
+    rng: optional, see g_rand
+    """
+    return _sample_with(_TimeBounds(mu, sigma,
+                                    -np.inf if lo is None else lo,
+                                    np.inf if hi is None else hi,
+                                    as_int), rng)
+
+
+def g_rand(mu, sigma=0, minimum=None, maximum=None, output_integers=True,
+           rng=None):
     """Helper function for generating pseudo-random numbers using a
     truncated gaussian distribution.
     
@@ -15,31 +266,27 @@ def g_rand(mu, sigma=0, minimum=None, maximum=None, output_integers=True):
         containing the letter 's' and a number to indicate the bound is
         mu + that number of standard deviations.  May also be None to
         indicate no upper bound.
+    rng: optional, a numpy Generator to draw from. By default samples
+        come from a module-level Generator, not the legacy np.random
+        global state, so np.random.seed() does not affect them.
+    
+    Without rng, samples are drawn in batches and handed out one per call,
+    so repeated calls with the same parameters only touch NumPy once per
+    batch. Only the first _GRAND_CACHE_MAX_KEYS parameter sets are batched;
+    any beyond that are drawn one at a time.
     """
     
-    n = np.random.normal(mu, sigma)
-    #print(n)
-    
-    if maximum is not None:
-        if isinstance(maximum, str) and 's' in maximum:
-            sigmas_max = float(maximum.replace('s', ''))
-            maximum = mu + (sigma * sigmas_max)
-        
-        if n > maximum:
-            n = maximum
-    
-    if minimum is not None:
-        if isinstance(minimum, str) and 's' in minimum:
-            sigmas_min = float(minimum.replace('s', ''))
-            minimum = mu - (sigma * sigmas_min)
-        
-        if n < minimum:
-            n = minimum
-    
-    if output_integers:
-        n = int(n)
-    
-    return n
+    return _sample_with(_resolve_bounds(mu, sigma, minimum, maximum, output_integers), rng)
+
+
+def g_rand_batch(n, mu, sigma=0, minimum=None, maximum=None, output_integers=True,
+                 rng=None):
+    """Vectorized counterpart to g_rand, returning a numpy array of n samples
+    from the same distribution in a single draw. Takes the same arguments
+    as g_rand, plus n, the number of samples.
+    """
+    return _grand_batch(*_resolve_bounds(mu, sigma, minimum, maximum, output_integers), n,
+                        _rng if rng is None else rng)
 
 
 def gen_resource_universe(resource_definitions, env):
@@ -69,40 +316,81 @@ def gen_activity_universe(activity_definitions, resources_all):
     
     """
     
-    return { k: CareActivity(v['time_requirements'],
+    # check each referenced Resource once here, rather than once per
+    # CareActivity that uses it
+    resource_labels = {r for v in activity_definitions.values() for r in v['required_resources']}
+    if not all(isinstance(resources_all[r], simpy.Resource) for r in resource_labels):
+        raise Exception("required_resources must be iterable containing only simpy Resource objects or subclasses thereof")
+    
+    return { k: CareActivity._from_trusted(v['time_requirements'],
              required_resources=[resources_all[r] for r in v['required_resources']],
              label=k) for k, v in activity_definitions.items() }
 
 
-def extract_event_data(patient_list, append_data={}):
+def extract_event_data(patient_list, append_data={}, entry_filter=None):
     """Helper function to put patient event data into a list of dicts
     
     patient_list: required, iterable of Patient instances
     append_data: optional dictionary of key: value pairs to tack on, such as an iteration number
+    entry_filter: optional journal entry label, e.g. 'recovery:end', to
+        only extract events with that entry
     
     """
-
+    
     event_data = []
     for patient_number, patient in enumerate(patient_list):
-        #print(patient.journal)
-        for e in patient.journal:
+        for t, e in zip(patient._journal_timestamps, patient._journal_entries):
+            if entry_filter is not None and e != entry_filter:
+                continue
             datum = {'patient': patient_number,
-                    'entry': e['entry'],
-                    'timestamp': e['timestamp']}
+                    'entry': e,
+                    'timestamp': t}
             datum.update(append_data)
-            #e.update({'patient': patient_number})
-            #print(e)
-            #e['patient'] = patient_number
             event_data.append(datum)
-            #for key, value in e.items():
-            #    d = {'patient': patient_number}
-            #    d.update(e)
-            #    event_data.append(d)
     
     return event_data
 
 
+def extract_event_columns(patient_list, append_data={}, entry_filter=None):
+    """Column-wise counterpart to extract_event_data, returning a dict of
+    numpy arrays (patient, entry, timestamp, plus any append_data keys)
+    that can be handed straight to pandas.DataFrame without per-row
+    dict parsing. Timestamps come back as floats, with nan for entries
+    journaled without one.
+    
+    patient_list: required, iterable of Patient instances
+    append_data: optional dictionary of key: value pairs to tack on, such as an iteration number
+    entry_filter: optional, as for extract_event_data
+    
+    """
+    patient_list = list(patient_list)
+    counts = [len(p._journal_entries) for p in patient_list]
+    total = sum(counts)
+    
+    columns = {
+        'patient': np.repeat(np.arange(len(patient_list)), counts),
+        'entry': np.array([e for p in patient_list for e in p._journal_entries], dtype=object),
+        'timestamp': np.fromiter((t for p in patient_list for t in p._journal_timestamps), dtype=float, count=total)
+        }
+    
+    if entry_filter is not None:
+        keep = columns['entry'] == entry_filter
+        columns = {k: v[keep] for k, v in columns.items()}
+        total = len(columns['entry'])
+    
+    for k, v in append_data.items():
+        columns[k] = np.full(total, v)
+    
+    return columns
+
+
 class Patient(object):
+    # Patients, Needs and CareActivities are created for every replication,
+    # so skip the per-instance __dict__
+    __slots__ = ('label', 'needs', 'logger', 'status',
+                 '_journal_timestamps', '_journal_entries',
+                 '_next_idx', '_unmet_count')
+    
     def __init__(self, needs=[], label=None, logger=None,
                  needs_list=None, activity_universe=None):
         """Can pass with a list of needs (Need instances) or, alternatively,
@@ -111,15 +399,29 @@ class Patient(object):
         self.label = label
         self.needs = needs # list of Need instances
         self.logger = logger
-        self.journal = []
         
-        if len(self.needs) == 0 and all([isinstance(i, str) for i in needs_list]):
+        # journal is kept column-wise, see journal_entry()
+        self._journal_timestamps = []
+        self._journal_entries = []
+        
+        if len(self.needs) == 0 and all(isinstance(i, str) for i in needs_list):
             # no needs were supplied
             # but we did get a list of strings in needs_list
             # which ought to be a bunch of labels for CareActivity instances
             
             # overwrite the needs with these new, matched ones
             self.needs = [self._need_from_activity_label(n, activity_universe) for n in needs_list]
+        
+        # needs are worked through in order, so rather than rescanning
+        # self.needs on every lookup, track where the first unmet one is
+        # and how many remain; each Need reports back when it is met, see
+        # _on_need_met()
+        self._next_idx = 0
+        self._unmet_count = 0
+        for n in self.needs:
+            n.patient = self
+            if not n._met:
+                self._unmet_count += 1
     
     def __str__(self): # human-readable string
         return "<Patient {}>".format(self.label)
@@ -143,21 +445,37 @@ class Patient(object):
         return ' --> '.join([n.care_activity_label for n in self.needs])
     
     def _unmet_need_count(self):
-        return sum([1 if not n.met == True else 0 for n in self.needs])
+        return self._unmet_count
     
     def _needs_met(self):
-        return self._unmet_need_count == 0
+        return self.unmet_need_count == 0
     
     def _string_unmet_needs(self, separator=', '):
-        return separator.join([n.label for n in self.needs if not n.met])
+        return separator.join([n.label for n in self.needs[self._next_idx:] if not n.met])
     
     def get_next_unmet_need(self):
-        for n in self.needs:
-            if n.is_unmet:
-                return n
+        needs = self.needs
+        i = self._next_idx
+        while i < len(needs) and needs[i]._met:
+            i += 1
+        self._next_idx = i
+        
+        if i < len(needs):
+            return needs[i]
         
         return None
     
+    def _on_need_met(self, met=True):
+        """Bookkeeping called by one of this patient's Needs when it is met,
+        or marked unmet again (met=False).
+        """
+        if met:
+            self._unmet_count -= 1
+        else:
+            # it may sit before the next unmet need found so far
+            self._unmet_count += 1
+            self._next_idx = 0
+    
     
     # properties for easy access
     hr_route = property(_hr_route)
@@ -167,6 +485,12 @@ class Patient(object):
     string_unmet_needs = property(_string_unmet_needs)
     
     
+    def _will_log(self, loglevel=20):
+        """Whether a status_update at this loglevel would reach the logger,
+        so callers can skip building messages nobody will see.
+        """
+        return self.logger is not None and self.logger.isEnabledFor(loglevel)
+    
     # if timestamp is passed here, it obviates the need to pass env at
     # instantiation and store it above
     def status_update(self, status, timestamp=None, log=True,
@@ -176,18 +500,38 @@ class Patient(object):
             that 20 corresponds to 'INFO' level logging.
         """
         self.status = status
-        if log == True and self.logger is not None:
+        if log == True and self._will_log(loglevel):
             message = chunk_separator.join([str(timestamp), str(self), self.status])
             self.logger.log(loglevel, message)
         
         if journal == True:
             self.journal_entry(self.status, timestamp)
     
+    def status_update_entry(self, entry, timestamp=None, log=True,
+                            loglevel=20, chunk_separator=';;'):
+        """Same as status_update(entry, ..., journal=True), trimmed down for
+        provide_care, which journals a prebuilt CareActivity entry for every
+        event.
+        """
+        self.status = entry
+        if log == True and self._will_log(loglevel):
+            message = chunk_separator.join([str(timestamp), str(self), entry])
+            self.logger.log(loglevel, message)
+        
+        self._journal_timestamps.append(timestamp)
+        self._journal_entries.append(entry)
+    
     # this may seem like a duplicate record, but it keeps these entries
     # stored on the Patient instance for more convenient inspection
     def journal_entry(self, entry, timestamp=None):
-        self.journal.append({'timestamp': timestamp,
-                            'entry': entry})
+        self._journal_timestamps.append(timestamp)
+        self._journal_entries.append(entry)
+    
+    def _journal(self):
+        """Journal as a list of {'timestamp': ..., 'entry': ...} dicts"""
+        return [{'timestamp': t, 'entry': e} for t, e in zip(self._journal_timestamps, self._journal_entries)]
+    
+    journal = property(_journal)
 
 
 class CareActivity(object):
@@ -195,20 +539,48 @@ class CareActivity(object):
     their care. For example, a Procedure, a PreOpCheckIn,
     a PacuRecovery.
     """
+    __slots__ = ('time_requirements', 'label', 'required_resources',
+                 '_resolved_params', '_event_labels',
+                 '_keep_resources_until_next_activity')
+    
     def __init__(self, time_requirements, required_resources=[],
                  label='Untitled', keep_resources_until_next_activity=True):
-
+        
+        if not all(isinstance(r, simpy.Resource) for r in required_resources):
+            raise Exception("required_resources must be iterable containing only simpy Resource objects or subclasses thereof")
+        
+        self._setup(time_requirements, required_resources, label,
+                    keep_resources_until_next_activity)
+    
+    @classmethod
+    def _from_trusted(cls, time_requirements, required_resources=[],
+                      label='Untitled', keep_resources_until_next_activity=True):
+        """Internal alternate constructor that skips the required_resources
+        check, for callers (like gen_activity_universe) that have already
+        validated them once up front.
+        """
+        self = cls.__new__(cls)
+        self._setup(time_requirements, required_resources, label,
+                    keep_resources_until_next_activity)
+        return self
+    
+    def _setup(self, time_requirements, required_resources, label,
+               keep_resources_until_next_activity):
         self.time_requirements = time_requirements
+        self._resolved_params = _resolve_params(time_requirements)
         self.label = label
-        self._keep_resources_until_next_activity = keep_resources_until_next_activity
         
-        if all([isinstance(r, simpy.Resource) for r in required_resources]):
-            self.required_resources = required_resources
-        else:
-            raise Exception("required_resources must be iterable containing only simpy Resource objects or subclasses thereof")
+        # journal entries '<label>:queue', '<label>:start', '<label>:end',
+        # built once here and shared by every patient's journal rather than
+        # formatted again for every event
+        self._event_labels = tuple('{}:{}'.format(label, phase) for phase in EVENT_PHASES)
+        self._keep_resources_until_next_activity = keep_resources_until_next_activity
+        self.required_resources = required_resources
 
 
 class Need(object):
+    __slots__ = ('care_activity', 'patient', '_met', '_met_timestamp')
+    
     def __init__(self, care_activity, met=False):
         """Belongs to a Patient and connects to an CareActivity (or CareActivity
         subclass). 
@@ -219,7 +591,9 @@ class Need(object):
         else:
             raise Exception("obj_activity must be a CareActivity object or subclass thereof")
         
-        self.met = met
+        # set by the owning Patient, which is told whenever met changes
+        self.patient = None
+        self._met = met
         self._met_timestamp = None
     
     def _status(self):
@@ -244,11 +618,22 @@ class Need(object):
     def _time_reqs(self):
         return self.care_activity.time_requirements
     
+    def _is_met(self):
+        return self._met
+    
+    def _set_met(self, met):
+        if self.patient is not None and bool(met) != bool(self._met):
+            self.patient._on_need_met(met)
+        self._met = met
+    
     def _meet(self, timestamp=None):
-        self.met = True
+        if not self._met and self.patient is not None:
+            self.patient._on_need_met()
+        self._met = True
         self._met_timestamp = timestamp
     
     care_activity_label = property(_care_activity_label)
+    met = property(_is_met, _set_met)
     is_unmet = property(_is_unmet)
     label = property(_get_label)
     status = property(_status)
@@ -263,14 +648,20 @@ class Need(object):
 
 
 class SimulatedUnit(object):
-    def __init__(self, env, resources={}, care_activities={}):
+    def __init__(self, env, resources={}, care_activities={}, rng=None):
         """For example, an outpatient surgery center, a GI suite, an inpatient
         acute care ward, an intensive care unit, an emergency department, etc.
+        
+        rng: optional, a numpy Generator that all of this unit's activity
+            durations are drawn from, e.g. np.random.default_rng(seed) for a
+            reproducible replication. Defaults to a fresh default_rng().
         """
         self.env = env
         self.patients = []
         self.resources = resources
         self.care_activities = {}
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._samples = _SampleCache(self.rng)
         
     
     def _patient_count(self):
@@ -280,6 +671,16 @@ class SimulatedUnit(object):
     patient_count = property(_patient_count)
     
     
+    def reset(self):
+        """Drop all patients so the unit, along with its env and resources,
+        can be reused for another replication once env.run() has finished.
+        
+        The env clock is not rewound, so measure a replication's duration
+        from env.now at its start rather than from zero.
+        """
+        self.patients = []
+    
+    
     def provide_care(self, patient):
         
         while not patient.next_unmet_need == None:
@@ -287,36 +688,57 @@ class SimulatedUnit(object):
             # get the next unmet need
             # and try to meet it
             
-            patient.status_update('has {} unmet need(s): {}'.format(patient.unmet_need_count,
-                                                                    patient.string_unmet_needs), self.env.now)
+            # informational updates are only built when someone is listening;
+            # the journaled ones below always go through
+            verbose = patient._will_log()
+            now = self.env.now
+            
+            if verbose:
+                patient.status_update('has {} unmet need(s): {}'.format(patient.unmet_need_count,
+                                                                        patient.string_unmet_needs), now)
 
             # identify next unmet need in this patient's care sequence
             n = patient.next_unmet_need
+            activity = n.care_activity
+            required_resources = activity.required_resources
+            queue_label, start_label, end_label = activity._event_labels
 
-            patient.status_update('unmet need found: {}'.format(n.label), self.env.now)
-            patient.status_update('{}:queue'.format(n.label), journal=True, timestamp=self.env.now)
-            patient.status_update('unmet need {} requires resources: {}'.format(n.label, n.care_activity.required_resources), self.env.now)
+            if verbose:
+                patient.status_update('unmet need found: {}'.format(n.label), now)
+            patient.status_update_entry(queue_label, now)
+            if verbose:
+                patient.status_update('unmet need {} requires resources: {}'.format(n.label, required_resources), now)
 
-            reqs = [r.request() for r in n.care_activity.required_resources]
-            reqs_allof = simpy.AllOf(self.env, reqs)
+            # wait til all required resources are available; a lone request
+            # can be yielded directly without wrapping it in an AllOf
+            reqs = [r.request() for r in required_resources]
+            if len(reqs) == 1:
+                reqs_ready = reqs[0]
+            else:
+                reqs_ready = simpy.AllOf(self.env, reqs)
 
-            # wait til all required resources are available
-            yield reqs_allof
-            patient.status_update('unmet need {} required resources available: {}'.format(n, reqs_allof.ok), self.env.now)
+            yield reqs_ready
+            now = self.env.now
+            if verbose:
+                patient.status_update('unmet need {} required resources available: {}'.format(n, reqs_ready.ok), now)
 
             # meet that need
-            patient.status_update('{}:start'.format(n.label), journal=True, timestamp=self.env.now)
-            yield self.env.timeout(g_rand(**n.time_requirements))
-            timestamp_met = self.env.now
-            patient.status_update('timeout elapsed, activity {} complete'.format(n.care_activity), self.env.now)
+            patient.status_update_entry(start_label, now)
+            yield self.env.timeout(_sample_trunc(activity._resolved_params, self._samples))
+            now = self.env.now
+            if verbose:
+                patient.status_update('timeout elapsed, activity {} complete'.format(activity), now)
 
-            n._meet(timestamp_met)
-            patient.status_update('need met {}'.format(n), self.env.now)
+            n._meet(now)
+            if verbose:
+                patient.status_update('need met {}'.format(n), now)
             
-            patient.status_update('{}:end'.format(n.label), journal=True, timestamp=self.env.now)
+            patient.status_update_entry(end_label, now)
 
             # release occupied resources
-            [resource.release(reqs[i]) for i, resource in enumerate(n.care_activity.required_resources)]
-            patient.status_update('resources released {}'.format(n.care_activity.required_resources), self.env.now)
+            for resource, req in zip(required_resources, reqs):
+                resource.release(req)
+            if verbose:
+                patient.status_update('resources released {}'.format(required_resources), now)
         
         patient.status_update('Complete')
@@ -1,52 +1,234 @@
+import hashlib
+import os
+import pickle
 import unittest
+from functools import lru_cache
+import numpy as np
 import simpy
-import pandas as pd
 from scipy import stats
 import strose
 
-def run_simulation(unit, env, logger=None):
-    """Assumes patients are in a collection at unit.patients
+# every simulated patient goes pre-op -> procedure -> recovery
+PATIENT_DEFINITION = { 'needs_list': ['preop', 'procedure', 'recovery' ] }
+
+
+@lru_cache(maxsize=None)
+def unit_definitions(capacity, time_requirements):
+    """Shared resource and activity definition templates for the simulation
+    tests: one Resource of the given capacity per step in
+    PATIENT_DEFINITION, with fixed time requirements for each step.
+    
+    Keyed on hashable arguments (time_requirements as a tuple) so each
+    template is only built once; treat the returned dicts as read-only.
     """
-    for p in unit.patients:
-        env.process(unit.provide_care(p))
-        yield env.timeout(0)
+    resource_definitions = {
+        'preop_slot' : { 'capacity': capacity },
+        'procedure_room' : { 'capacity': capacity },
+        'recovery_slot' : { 'capacity': capacity }
+    }
+
+    activity_definitions = {
+        'preop' : { 'time_requirements': { 'mu': time_requirements[0] }, 'required_resources': ['preop_slot'] },
+        'procedure' : { 'time_requirements': { 'mu': time_requirements[1] }, 'required_resources': ['procedure_room'] },
+        'recovery' : { 'time_requirements': { 'mu': time_requirements[2] }, 'required_resources': ['recovery_slot'] }
+    }
+    
+    return resource_definitions, activity_definitions
+
+
+def cached_fixture(key, build):
+    """Return build(), memoized on disk when the STROSE_TEST_CACHE
+    environment variable names a cache directory (e.g. .test_cache).
+    Without it, build() simply runs every time.
+    
+    key: picklable-repr description of the fixture's inputs. The cache file
+        is named by a hash of key together with the strose and test module
+        sources and the simpy and numpy versions, so any change to the code
+        under test invalidates it.
+    """
+    cache_dir = os.environ.get('STROSE_TEST_CACHE')
+    if not cache_dir:
+        return build()
+    
+    digest = hashlib.sha256(repr((key, simpy.__version__, np.__version__)).encode())
+    for source in (strose.__file__, __file__):
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    path = os.path.join(cache_dir, '{}.pkl'.format(digest.hexdigest()))
+    
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    
+    result = build()
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(result, f)
+    
+    return result
+
+
+def run_replications(seed, iterations, resource_definitions, activity_definitions,
+                     patient_definition, patient_num, entry_filter=None):
+    """Run a batch of independent replications on one reused env and unit,
+    drawing activity durations from an RNG seeded with seed.
+    
+    Returns a (runtime, event_columns) pair per replication, where
+    event_columns is strose.extract_event_columns output (limited to
+    entry_filter, if given) with timestamps relative to the start of that
+    replication. Only these plain values are returned, never the SimPy
+    objects, so the results can be pickled by cached_fixture.
+    
+    The fixtures call this in-process rather than spreading replications
+    over worker processes: for a handful of deterministic replications,
+    starting a pool costs far more than running them.
+    """
+    # every replication runs to completion, so one env and unit (and
+    # their resources) can be reused rather than rebuilt each time
+    env = simpy.Environment()
+    u = strose.SimulatedUnit(env, resources=strose.gen_resource_universe(resource_definitions, env),
+                             rng=np.random.default_rng(seed))
+    
+    # patients only read from the activity universe, so they can all share
+    # one built against this unit's resources
+    activity_universe = strose.gen_activity_universe(activity_definitions, u.resources)
+    results = []
+    
+    for i in range(iterations):
+        u.reset()
+        start = env.now
+
+        for p in range(patient_num):
+            u.patients.append(strose.Patient(**patient_definition,
+                                      activity_universe=activity_universe))
+
+        # every patient shows up at the start of the replication
+        for p in u.patients:
+            env.process(u.provide_care(p))
+        env.run()
+
+        events = strose.extract_event_columns(u.patients, entry_filter=entry_filter)
+        events['timestamp'] -= start
+        results.append((env.now - start, events))
+    
+    return results
 
 
 class TestGaussianRandomHelper(unittest.TestCase):
     """Battery of tests to make sure I don't break the g_rand() helper function"""
-    def setUp(self, mu=0, sigma=1, iterations=100000, alpha=1e-6):
+    def setUp(self, mu=0, sigma=1, iterations=100000, bound_iterations=10000, alpha=1e-6):
         self.mu = mu
         self.sigma = sigma
-        self.iterations = iterations
+        self.iterations = iterations # for distribution shape, see test_normal
+        self.bound_iterations = bound_iterations # plenty to catch bound violations
         self.alpha = alpha
+        self.rng = np.random.default_rng()
     
     def test_normal(self):
         """Test whether the function generates normally distributed samples"""
-        samples = [strose.g_rand(mu=self.mu, sigma=self.sigma, output_integers=False) for x in range(self.iterations)]
+        samples = strose.g_rand_batch(self.iterations, self.mu, sigma=self.sigma, output_integers=False, rng=self.rng)
         k2, p = stats.normaltest(samples)
         self.assertGreater(p, self.alpha)
     
-    def test_upperBound(self, maximum=2):
-        """Test whether an upper bound, as specified by keyword 'maximum', is respected"""
-        samples = [strose.g_rand(self.mu, sigma=self.sigma, maximum=maximum, output_integers=False) for x in range(self.iterations)]
-        self.assertTrue(all([x <= maximum for x in samples]))
+    def test_bounds(self):
+        """Test whether upper and lower bounds, given either as numbers or as
+        a number of standard deviations ('3s'), are respected"""
+        cases = [
+            # name, g_rand bound keyword, extreme to check, assertion, true bound
+            ('upperBound', {'maximum': 2}, np.max, self.assertLessEqual, 2),
+            ('lowerBound', {'minimum': -1}, np.min, self.assertGreaterEqual, -1),
+            ('sigmaUpperBound', {'maximum': '3s'}, np.max, self.assertLessEqual, self.mu + (3 * self.sigma)),
+            ('sigmaLowerBound', {'minimum': '3s'}, np.min, self.assertGreaterEqual, self.mu - (3 * self.sigma)),
+        ]
+        
+        for name, bound, extreme, check, true_bound in cases:
+            with self.subTest(name=name):
+                samples = strose.g_rand_batch(self.bound_iterations, self.mu, sigma=self.sigma, **bound, output_integers=False, rng=self.rng)
+                check(extreme(samples), true_bound)
+    
+    def test_upperTailLowerBound(self, minimum=9):
+        """Test whether a lower bound far out in the upper tail still yields
+        finite samples that respect the bound"""
+        samples = strose.g_rand_batch(self.bound_iterations, self.mu, sigma=self.sigma, minimum=minimum, output_integers=False, rng=self.rng)
+        self.assertTrue(np.isfinite(samples).all())
+        self.assertGreaterEqual(samples.min(), minimum)
+    
+    def test_farTailBounds(self, sigmas=40):
+        """Test whether bounds so far out in either tail that the normal CDF
+        underflows still yield finite samples at the bound, as floats and as
+        integers"""
+        cases = [
+            # name, g_rand bound keyword, true bound
+            ('upperTail', {'minimum': self.mu + (sigmas * self.sigma)}, self.mu + (sigmas * self.sigma)),
+            ('lowerTail', {'maximum': self.mu - (sigmas * self.sigma)}, self.mu - (sigmas * self.sigma)),
+        ]
+        
+        for name, bound, true_bound in cases:
+            for output_integers in (False, True):
+                with self.subTest(name=name, output_integers=output_integers):
+                    samples = strose.g_rand_batch(self.bound_iterations, self.mu, sigma=self.sigma, **bound, output_integers=output_integers, rng=self.rng)
+                    self.assertTrue((samples == int(true_bound)).all())
+                    self.assertEqual(strose.g_rand(self.mu, self.sigma, **bound, output_integers=output_integers), true_bound)
+    
+    def test_truncatedShape(self):
+        """Test whether bounded samples follow the truncated gaussian
+        distribution, not just stay inside the bounds"""
+        cases = [
+            # name, minimum, maximum
+            ('twoSided', -1, 2),
+            ('upperTail', 3, 5),
+        ]
+        
+        for name, minimum, maximum in cases:
+            with self.subTest(name=name):
+                samples = strose.g_rand_batch(self.bound_iterations, self.mu, sigma=self.sigma, minimum=minimum, maximum=maximum, output_integers=False, rng=self.rng)
+                a, b = (minimum - self.mu) / self.sigma, (maximum - self.mu) / self.sigma
+                D, p = stats.kstest(samples, stats.truncnorm(a, b, loc=self.mu, scale=self.sigma).cdf)
+                self.assertGreater(p, self.alpha)
+    
+    def test_scalarBounds(self, iterations=10000):
+        """Test whether single draws from g_rand respect 's'-string bounds on
+        both sides and come back as integers by default"""
+        samples = [strose.g_rand(100, sigma=10, minimum='2s', maximum='1s') for x in range(iterations)]
+        self.assertTrue(all(isinstance(x, int) for x in samples))
+        
+        samples = np.asarray(samples)
+        self.assertGreaterEqual(samples.min(), 80)
+        self.assertLessEqual(samples.max(), 110)
     
-    def test_lowerBound(self, minimum=-1):
-        """Test whether a lower bound, as specified by keyword 'minimum', is respected"""
-        samples = [strose.g_rand(self.mu, sigma=self.sigma, minimum=minimum, output_integers=False) for x in range(self.iterations)]
-        self.assertTrue(all([x >= minimum for x in samples]))
+    def test_crossedBounds(self, iterations=100):
+        """Test whether a minimum above the maximum wins, as it did when
+        g_rand clamped to the maximum and then the minimum"""
+        for bounds in ({'minimum': 2, 'maximum': 1}, {'minimum': 10, 'maximum': '0.1s'}):
+            with self.subTest(**bounds):
+                samples = [strose.g_rand(5, 10, **bounds) for x in range(iterations)]
+                samples += strose.g_rand_batch(iterations, 5, 10, **bounds).tolist()
+                self.assertEqual(set(samples), {bounds['minimum']})
     
-    def test_sigmaUpperBound(self, sigma_max = '3s'):
-        """Test whether an upper bound based on maximum standard deviations is respected"""
-        true_maximum = self.mu + (3 * self.sigma)
-        samples = [strose.g_rand(self.mu, sigma=self.sigma, maximum=sigma_max, output_integers=False) for x in range(self.iterations)]
-        self.assertTrue(all([x <= true_maximum for x in samples]))
+    def test_negativeSigma(self):
+        """Test whether a negative sigma is rejected with or without bounds"""
+        for bounds in ({}, {'maximum': 2}, {'minimum': '1s'}):
+            with self.subTest(**bounds):
+                with self.assertRaises(ValueError):
+                    strose.g_rand(self.mu, -1, **bounds)
     
-    def test_sigmaLowerBound(self, sigma_min='3s'):
-        """Test whether a lower bound based on maximum standard deviations is respected"""
-        true_minimum = self.mu - (3 * self.sigma)
-        samples = [strose.g_rand(self.mu, sigma=self.sigma, minimum=sigma_min, output_integers=False) for x in range(self.iterations)]
-        self.assertTrue(all([x >= true_minimum for x in samples]))
+    def test_resolvedBounds(self, seed=0, iterations=100):
+        """Test whether g_rand_resolved matches g_rand for the same bounds,
+        with None standing in for no bound"""
+        cases = [
+            # name, g_rand bounds, equivalent g_rand_resolved bounds
+            ('bounded', {'minimum': '2s', 'maximum': '1s'}, {'lo': 80, 'hi': 110}),
+            ('unbounded', {'minimum': None, 'maximum': None}, {'lo': None, 'hi': None}),
+        ]
+        
+        for name, bounds, resolved in cases:
+            with self.subTest(name=name):
+                g_rng, r_rng = np.random.default_rng(seed), np.random.default_rng(seed)
+                expected = [strose.g_rand(100, 10, **bounds, rng=g_rng) for x in range(iterations)]
+                actual = [strose.g_rand_resolved(100, 10, **resolved, rng=r_rng) for x in range(iterations)]
+                self.assertEqual(actual, expected)
 
 
 class TestNoWaitSimulation(unittest.TestCase):
@@ -55,110 +237,239 @@ class TestNoWaitSimulation(unittest.TestCase):
     and patients are all the same, and all the patients show up at the
     start of the simulation."""
     
-    def setUp(self, iterations=1000, patient_num=5, time_requirements=[30, 90, 60]):
-        self._iterations = iterations
-        self._patient_num = 5
-        self._units = []
-        self._runtimes = []
+    @classmethod
+    def setUpClass(cls, iterations=3, patient_num=5, time_requirements=[30, 90, 60]):
+        # there's no randomness in these inputs, so a few replications are
+        # enough to show the results are what we expect and repeatable
+        cls._iterations = iterations
+        cls._patient_num = 5
         
-        self._resource_definitions = {
-            'preop_slot' : { 'capacity': self._patient_num },
-            'procedure_room' : { 'capacity': self._patient_num },
-            'recovery_slot' : { 'capacity': self._patient_num }
-        }
-
-        self._activity_definitions = {
-            'preop' : { 'time_requirements': { 'mu': time_requirements[0] }, 'required_resources': ['preop_slot'] },
-            'procedure' : { 'time_requirements': { 'mu': time_requirements[1] }, 'required_resources': ['procedure_room'] },
-            'recovery' : { 'time_requirements': { 'mu': time_requirements[2] }, 'required_resources': ['recovery_slot'] }
-        }
+        cls._resource_definitions, cls._activity_definitions = unit_definitions(cls._patient_num, tuple(time_requirements))
+        cls._generic_patient_definition = PATIENT_DEFINITION
+        cls._anticipated_runtime = sum(time_requirements)
         
-        self._generic_patient_definition = { 'needs_list': ['preop', 'procedure', 'recovery' ] }
-        self._anticipated_runtime = sum(time_requirements)
         
+        def build():
+            results = run_replications(0, cls._iterations,
+                                       resource_definitions=cls._resource_definitions,
+                                       activity_definitions=cls._activity_definitions,
+                                       patient_definition=cls._generic_patient_definition,
+                                       patient_num=cls._patient_num)
+            
+            # runtimes indexed by iteration
+            return np.fromiter((runtime for runtime, events in results), dtype=np.float64, count=cls._iterations)
         
-        for i in range(self._iterations):
-            env = simpy.Environment()
-            u = strose.SimulatedUnit(env, resources=strose.gen_resource_universe(self._resource_definitions, env))
-
-            for p in range(self._patient_num):
-                u.patients.append(strose.Patient(**self._generic_patient_definition,
-                                          activity_universe=strose.gen_activity_universe(self._activity_definitions, u.resources)))
-
-            env.process(run_simulation(u, env))
-            env.run()
-
-            self._units.append(u)
-            self._runtimes.append({'iteration': i, 'runtime': env.now})
+        cls._runtimes = cached_fixture((cls.__name__, cls._iterations, cls._resource_definitions,
+                                        cls._activity_definitions, cls._generic_patient_definition,
+                                        cls._patient_num), build)
         
     
     def test_expectedRuntimes(self):
         """Ensure these multiple patients all finish at the expected time,
         given that they should never be waiting for Resource requests.
+        Since every replication must hit the same expected time, this also
+        covers the run times being uniform.
         """
-        for r in self._runtimes:
-            self.assertEqual(r['runtime'], self._anticipated_runtime)
-    
-    
-    def test_uniformRuntimes(self):
-        """Test whether total run times are uniform, as expected
-        when there is no variability, bottlenecks, or waiting."""
-        self.assertTrue(all([r['runtime'] == self._runtimes[0]['runtime'] for r in self._runtimes]))
+        for i, runtime in enumerate(self._runtimes):
+            self.assertEqual(runtime, self._anticipated_runtime, 'iteration {}'.format(i))
 
 
 class TestBottleneckedSimulation(unittest.TestCase):
     """Generate a basic simulation that is bottlenecked by limited Resource.
     """
     
-    def setUp(self, iterations=1000):
-        self._time_requirements = [30, 90, 60]
-        self._patient_num = 5
-        self._resource_capacity = 1
-        self._anticipated_finishes = [180, 270, 360, 450, 540]
-
-        self._iterations = 1000
-        self._units = []
-        self._runtimes = []
-        self._finishes = []
-
-        self._resource_definitions = {
-            'preop_slot' : { 'capacity': self._resource_capacity },
-            'procedure_room' : { 'capacity': self._resource_capacity },
-            'recovery_slot' : { 'capacity': self._resource_capacity }
-        }
-
-        self._activity_definitions = {
-            'preop' : { 'time_requirements': { 'mu': self._time_requirements[0] }, 'required_resources': ['preop_slot'] },
-            'procedure' : { 'time_requirements': { 'mu': self._time_requirements[1] }, 'required_resources': ['procedure_room'] },
-            'recovery' : { 'time_requirements': { 'mu': self._time_requirements[2] }, 'required_resources': ['recovery_slot'] }
-        }
-
-        self._generic_patient_definition = { 'needs_list': ['preop', 'procedure', 'recovery' ] }
-
+    @classmethod
+    def setUpClass(cls, iterations=3):
+        # deterministic inputs, see TestNoWaitSimulation
+        cls._time_requirements = [30, 90, 60]
+        cls._patient_num = 5
+        cls._resource_capacity = 1
+        cls._anticipated_finishes = [180, 270, 360, 450, 540]
 
-        for i in range(self._iterations):
-            env = simpy.Environment()
-            u = strose.SimulatedUnit(env, resources=strose.gen_resource_universe(self._resource_definitions, env))
+        cls._iterations = iterations
 
-            for p in range(self._patient_num):
-                u.patients.append(strose.Patient(**self._generic_patient_definition,
-                                          activity_universe=strose.gen_activity_universe(self._activity_definitions, u.resources)))
+        cls._resource_definitions, cls._activity_definitions = unit_definitions(cls._resource_capacity, tuple(cls._time_requirements))
+        cls._generic_patient_definition = PATIENT_DEFINITION
 
-            env.process(run_simulation(u, env))
-            env.run()
+        def build():
+            results = run_replications(0, cls._iterations,
+                                       resource_definitions=cls._resource_definitions,
+                                       activity_definitions=cls._activity_definitions,
+                                       patient_definition=cls._generic_patient_definition,
+                                       patient_num=cls._patient_num,
+                                       entry_filter='recovery:end')
 
-            self._units.append(u)
-            self._runtimes.append({'iteration': i, 'runtime': env.now})
-            df = pd.DataFrame(strose.extract_event_data(u.patients))
-
-            self._finishes.append(list(df[ df['entry'] == 'recovery:end' ]['timestamp']))
+            runtimes = np.empty(cls._iterations, dtype=np.float64)
+            finishes = {} # distinct finish lists: first iteration that produced each
+            
+            for i, (runtime, events) in enumerate(results):
+                runtimes[i] = runtime
+                finishes.setdefault(tuple(events['timestamp'].tolist()), i)
+            
+            return runtimes, finishes
+        
+        cls._runtimes, cls._finishes = cached_fixture((cls.__name__, cls._iterations, cls._resource_definitions,
+                                                       cls._activity_definitions, cls._generic_patient_definition,
+                                                       cls._patient_num), build)
         
     
     def test_expectedFinishes(self):
         """Ensure these patients all finish at the expected time,
         given the wait for Resource requests.
         """
-        self.assertTrue(all([f == self._anticipated_finishes for f in self._finishes]))
+        for finishes, i in self._finishes.items():
+            self.assertEqual(list(finishes), self._anticipated_finishes, 'iteration {}'.format(i))
+    
+    def test_expectedRuntimes(self):
+        """Ensure each replication runs until the last patient finishes"""
+        for i, runtime in enumerate(self._runtimes):
+            self.assertEqual(runtime, self._anticipated_finishes[-1], 'iteration {}'.format(i))
+
+
+class TestMultiResourceSimulation(unittest.TestCase):
+    """Generate a simulation where one CareActivity needs two Resources at
+    once, so every patient has to wait for both."""
+    
+    def test_expectedFinishes(self):
+        """Ensure patients sharing a two-Resource activity finish one after
+        another"""
+        runtime, events = run_replications(0, 1,
+                                           resource_definitions={ 'a': { 'capacity': 1 }, 'b': { 'capacity': 1 } },
+                                           activity_definitions={ 'ab': { 'time_requirements': { 'mu': 5 }, 'required_resources': ['a', 'b'] } },
+                                           patient_definition={ 'needs_list': ['ab'] },
+                                           patient_num=3,
+                                           entry_filter='ab:end')[0]
+        self.assertEqual(events['timestamp'].tolist(), [5, 10, 15])
+
+
+class TestSeededSimulation(unittest.TestCase):
+    """Generate a simulation with variable time requirements, drawn from
+    each SimulatedUnit's own seeded rng."""
+    
+    @classmethod
+    def setUpClass(cls, patient_num=5):
+        cls._time_requirements = { 'mu': 60, 'sigma': 10, 'minimum': '2s', 'maximum': '1s' }
+        cls._duration_bounds = (40, 70)
+        
+        # same unit as the other simulations, but with every step's time
+        # requirements swapped for the variable ones above
+        resource_definitions, activity_definitions = unit_definitions(patient_num, (0, 0, 0))
+        cls._definitions = {
+            'resource_definitions': resource_definitions,
+            'activity_definitions': { k: dict(v, time_requirements=cls._time_requirements) for k, v in activity_definitions.items() },
+            'patient_definition': PATIENT_DEFINITION,
+            'patient_num': patient_num
+        }
+    
+    def _events(self, seed):
+        runtime, events = run_replications(seed, 1, **self._definitions)[0]
+        return events
+    
+    def test_seededFinishes(self):
+        """Ensure units seeded alike finish alike, and differently seeded
+        units don't"""
+        finishes = [self._events(seed)['timestamp'].tolist() for seed in (1, 1, 2)]
+        self.assertEqual(finishes[0], finishes[1])
+        self.assertNotEqual(finishes[0], finishes[2])
+    
+    def test_durationBounds(self):
+        """Ensure every activity duration stays within its bounds"""
+        events = self._events(3)
+        
+        for activity in PATIENT_DEFINITION['needs_list']:
+            starts = events['timestamp'][events['entry'] == '{}:start'.format(activity)]
+            ends = events['timestamp'][events['entry'] == '{}:end'.format(activity)]
+            durations = ends - starts
+            with self.subTest(activity=activity):
+                self.assertEqual(len(durations), self._definitions['patient_num'])
+                self.assertGreaterEqual(durations.min(), self._duration_bounds[0])
+                self.assertLessEqual(durations.max(), self._duration_bounds[1])
+
+
+class TestPatientNeeds(unittest.TestCase):
+    """Check a Patient's need bookkeeping as SimulatedUnit.provide_care
+    works through its needs."""
+    
+    def setUp(self):
+        resource_definitions, activity_definitions = unit_definitions(1, (30, 90, 60))
+        self.env = simpy.Environment()
+        self.unit = strose.SimulatedUnit(self.env, resources=strose.gen_resource_universe(resource_definitions, self.env))
+        self.activity_universe = strose.gen_activity_universe(activity_definitions, self.unit.resources)
+    
+    def test_needsMet(self):
+        """Ensure a patient ends up with no unmet needs once cared for"""
+        p = strose.Patient(**PATIENT_DEFINITION, activity_universe=self.activity_universe)
+        self.assertEqual(p.unmet_need_count, 3)
+        self.assertFalse(p.needs_met)
+        self.assertIs(p.next_unmet_need, p.needs[0])
+        
+        self.env.process(self.unit.provide_care(p))
+        self.env.run()
+        
+        self.assertEqual(p.unmet_need_count, 0)
+        self.assertTrue(p.needs_met)
+        self.assertIsNone(p.next_unmet_need)
+    
+    def test_preMetNeed(self):
+        """Ensure a need that is already met is counted as such and skipped"""
+        needs = [strose.Need(self.activity_universe['preop'], met=True),
+                 strose.Need(self.activity_universe['procedure'])]
+        p = strose.Patient(needs=needs)
+        self.assertEqual(p.unmet_need_count, 1)
+        self.assertIs(p.next_unmet_need, needs[1])
+        
+        self.env.process(self.unit.provide_care(p))
+        self.env.run()
+        
+        self.assertEqual(p.unmet_need_count, 0)
+        self.assertTrue(p.needs_met)
+        self.assertIsNone(p.next_unmet_need)
+        self.assertEqual(self.env.now, 90)
+        self.assertEqual([e['entry'] for e in p.journal], ['procedure:queue', 'procedure:start', 'procedure:end'])
+    
+    def test_metOutsideProvideCare(self):
+        """Ensure meeting needs directly, rather than through provide_care,
+        keeps the patient's counts up to date"""
+        p = strose.Patient(**PATIENT_DEFINITION, activity_universe=self.activity_universe)
+        
+        p.needs[0]._meet(0)
+        p.needs[1].met = True
+        self.assertEqual(p.unmet_need_count, 1)
+        self.assertIs(p.next_unmet_need, p.needs[2])
+        
+        p.needs[2]._meet(0)
+        self.assertEqual(p.unmet_need_count, 0)
+        self.assertTrue(p.needs_met)
+        self.assertIsNone(p.next_unmet_need)
+        
+        # marking a need unmet again makes it the next one up
+        p.needs[1].met = False
+        self.assertEqual(p.unmet_need_count, 1)
+        self.assertFalse(p.needs_met)
+        self.assertIs(p.next_unmet_need, p.needs[1])
+
+
+class TestEventExtraction(unittest.TestCase):
+    """Check the list-of-dicts event export on a small simulated run."""
+    
+    def setUp(self):
+        resource_definitions, activity_definitions = unit_definitions(1, (30, 90, 60))
+        env = simpy.Environment()
+        unit = strose.SimulatedUnit(env, resources=strose.gen_resource_universe(resource_definitions, env))
+        activity_universe = strose.gen_activity_universe(activity_definitions, unit.resources)
+        self.patients = [strose.Patient(**PATIENT_DEFINITION, activity_universe=activity_universe) for p in range(2)]
+        for p in self.patients:
+            env.process(unit.provide_care(p))
+        env.run()
+    
+    def test_entryFilter(self):
+        """Ensure entry_filter keeps only matching entries, and a label that
+        was never journaled matches nothing"""
+        events = strose.extract_event_data(self.patients, append_data={'iteration': 0}, entry_filter='recovery:end')
+        self.assertEqual(events, [{'patient': 0, 'entry': 'recovery:end', 'timestamp': 180, 'iteration': 0},
+                                  {'patient': 1, 'entry': 'recovery:end', 'timestamp': 270, 'iteration': 0}])
+        
+        self.assertEqual(strose.extract_event_data(self.patients, entry_filter='never:journaled'), [])
         
         
 if __name__ == '__main__':